@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Numeric kernels for trade calculations
+
+The plain Python definitions below are the single source of truth for
+the kernel bodies. trade.py picks the fastest implementation available
+at import time:
+
+1. the _trade_kernels_aot extension built ahead of time from this
+   module - steady-state numba speed with zero JIT warm-up, for
+   CLI/latency-sensitive use
+2. numba @njit over the same functions when numba is importable
+3. a vectorized numpy fallback
+
+To build the ahead-of-time extension (requires numba) run:
+
+    python _trade_kernels.py
+
+and ship the resulting _trade_kernels_aot shared library next to
+trade.py.
+"""
+
+import numpy as np
+
+VWAP_SIGNATURE = 'float64(int64[:], float64[:], float64[:], int64, int64)'
+
+
+def vwap(ts, qty, notional, n, cutoff):
+    """Volume Weighted Stock Price over trades with ts >= cutoff
+
+    timestamps are sorted, so the window start is a binary search away
+    instead of a linear walk back from the newest trade
+    """
+
+    i = np.searchsorted(ts[:n], cutoff, side='left')
+    total_traded = 0.0
+    total_quantity = 0.0
+    for j in range(i, n):
+        total_traded += notional[j]
+        total_quantity += qty[j]
+    if total_quantity == 0.0:
+        return 0.0
+    return total_traded / total_quantity
+
+
+def build():
+    """Ahead-of-time compile the kernels into _trade_kernels_aot"""
+
+    from numba.pycc import CC
+
+    cc = CC('_trade_kernels_aot')
+    cc.export('vwap', VWAP_SIGNATURE)(vwap)
+    cc.compile()
+
+
+if __name__ == '__main__':
+    build()
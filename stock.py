@@ -10,6 +10,8 @@ class StockType(Enum):
 
 
 class StockABC(ABC):
+    __slots__ = ('symbol', 'last_dividend', 'fixed_dividend', 'par_value')
+
     def __init__(self, symbol, last_dividend, fixed_dividend, par_value):
         """Initialise StockABC
 
@@ -58,6 +60,8 @@ class StockABC(ABC):
 
 
 class CommonStock(StockABC):
+    __slots__ = ('dividend_yield',)
+
     def __init__(self, symbol, last_dividend, par_value):
         """Initialise CommonStock
 
@@ -73,30 +77,35 @@ class CommonStock(StockABC):
             fixed_dividend=None,
             par_value=par_value)
 
-    def dividend_yield(self, price):
-        """Calculate Dividend Yield for a given Price
+        def dividend_yield(price):
+            """Calculate Dividend Yield for a given Price
 
-        No information is given about rounding rules. So no rounding,
-        ceiling or flooring is applied.
+            No information is given about rounding rules. So no rounding,
+            ceiling or flooring is applied.
 
-        I do not use Decimal for precision since pennies are used as
-        currency. And no information is given about precision requirements.
+            I do not use Decimal for precision since pennies are used as
+            currency. And no information is given about precision
+            requirements.
 
-        Args:
-            price: Price in pennies
+            Args:
+                price: Price in pennies
 
-        Returns:
-            Dividend Yield using formula:
+            Returns:
+                Dividend Yield using formula:
 
-            Last Dividend / Price
+                Last Dividend / Price
 
-            If price is 0 - dividend yield is 0.
-        """
+                If price is 0 - dividend yield is 0.
+            """
 
-        if price == 0:
-            return 0
+            if price == 0:
+                return 0
 
-        return self.last_dividend / price
+            return last_dividend / price
+
+        # the dividend is fixed after construction, so the closure above
+        # bakes it in and every call skips the self attribute lookup
+        self.dividend_yield = dividend_yield
 
     def __repr__(self):
         return 'CommonStock({symbol!r}, {last_dividend!r}, ' \
@@ -107,6 +116,8 @@ class CommonStock(StockABC):
 
 
 class PreferredStock(StockABC):
+    __slots__ = ('dividend_yield',)
+
     def __init__(self, symbol, last_dividend, fixed_dividend, par_value):
         """Initialise PreferredStock
 
@@ -123,31 +134,37 @@ class PreferredStock(StockABC):
             fixed_dividend=fixed_dividend,
             par_value=par_value)
 
-    def dividend_yield(self, price):
-        """Calculate Dividend Yield for a given Price
+        # fixed_dividend is in percents, we have to divide by 100;
+        # precomputed once since both values are fixed after construction
+        dividend = (fixed_dividend * par_value) / 100
 
-        No information is given about rounding rules. So no rounding,
-        ceiling or flooring is applied.
+        def dividend_yield(price):
+            """Calculate Dividend Yield for a given Price
 
-        I do not use Decimal for precision since pennies are used as
-        currency. And no information is given about precision requirements.
+            No information is given about rounding rules. So no rounding,
+            ceiling or flooring is applied.
 
-        Args:
-            price: Price in pennies
+            I do not use Decimal for precision since pennies are used as
+            currency. And no information is given about precision
+            requirements.
 
-        Returns:
-            Dividend Yield using formula:
+            Args:
+                price: Price in pennies
 
-            (Fixed Dividend * Par Value) / Price
+            Returns:
+                Dividend Yield using formula:
 
-            If Price is 0 - Dividend Yield is 0.
-        """
+                (Fixed Dividend * Par Value) / Price
 
-        if price == 0:
-            return 0
+                If Price is 0 - Dividend Yield is 0.
+            """
+
+            if price == 0:
+                return 0
 
-        # fixed_dividend is in percents, we have to divide by 100
-        return (self.fixed_dividend * self.par_value) / (price * 100)
+            return dividend / price
+
+        self.dividend_yield = dividend_yield
 
     def __repr__(self):
         return 'PreferredStock({symbol!r}, {last_dividend!r}, ' \
@@ -176,9 +193,21 @@ class StockFactory(object):
         StockType.PREFERRED: PreferredStock,
     }
 
+    # raw argument -> stock class, so repeated constructions skip the
+    # Enum value lookup; invalid values still raise via the fallback
+    _resolve_cache = {
+        StockType.COMMON.value: CommonStock,
+        StockType.PREFERRED.value: PreferredStock,
+        StockType.COMMON: CommonStock,
+        StockType.PREFERRED: PreferredStock,
+    }
+
     def __new__(self, stock_type, *args, **kwargs):
-        stock = self.stock_types[StockType(stock_type)](*args, **kwargs)
-        return stock
+        stock_class = self._resolve_cache.get(stock_type)
+        if stock_class is None:
+            stock_class = self.stock_types[StockType(stock_type)]
+            self._resolve_cache[stock_type] = stock_class
+        return stock_class(*args, **kwargs)
 
 
 if __name__ == "__main__":
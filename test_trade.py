@@ -116,6 +116,96 @@ class TestSimpleTradeListMethods(unittest.TestCase):
             stl3.volume_weighted_stock_price(self.stock1.symbol, now=now),
             25)
 
+    def test_record_trades(self):
+        now = datetime.datetime.now()
+
+        stl1 = trade.SimpleTradeList()
+        stl1.record_trades([
+            trade.Trade(self.stock1, now - timedelta(minutes=3),
+                        2, 'Buy', 2),
+            trade.Trade(self.stock2, now - timedelta(minutes=2),
+                        1, 'Buy', 8),
+            trade.Trade(self.stock1, now - timedelta(minutes=2),
+                        3, 'Buy', 5),
+            trade.Trade(self.stock1, now - timedelta(minutes=1),
+                        4, 'Buy', 6),
+        ])
+
+        self.assertAlmostEqual(
+            stl1.volume_weighted_stock_price(self.stock1.symbol, now=now),
+            4.77,
+            places=1)
+        self.assertEqual(
+            stl1.volume_weighted_stock_price(self.stock2.symbol, now=now),
+            8)
+        self.assertEqual(stl1.get_last_timestamp(),
+                         now - timedelta(minutes=1))
+
+    def test_record_trades_failed_batch(self):
+        now = datetime.datetime.now()
+
+        stl1 = trade.SimpleTradeList()
+        stl1.record_trade(trade.Trade(self.stock1, now - timedelta(minutes=3),
+                                      1, 'Buy', 8))
+        stl1.geometric_mean()  # warm the memoized log sum
+
+        with self.assertRaises(ValueError):
+            stl1.record_trades([
+                trade.Trade(self.stock1, now - timedelta(minutes=2),
+                            1, 'Buy', 2),
+                trade.Trade(self.stock2, now - timedelta(minutes=1),
+                            1, 'Buy', 4),
+                # out of order for stock2
+                trade.Trade(self.stock2, now - timedelta(minutes=2),
+                            1, 'Buy', 4),
+            ])
+
+        # the failed batch must not be applied at all, not even the
+        # groups that were valid on their own
+        self.assertEqual(stl1.traded_price_count, 1)
+        self.assertAlmostEqual(stl1.geometric_mean(), 8)
+        self.assertEqual(stl1.get_last_timestamp(),
+                         now - timedelta(minutes=3))
+
+    def test_volume_weighted_stock_prices(self):
+        now = datetime.datetime.now()
+
+        stl1 = trade.SimpleTradeList()
+        self.assertEqual(stl1.volume_weighted_stock_prices(now=now), {})
+
+        stl1.record_trades([
+            trade.Trade(self.stock1, now - timedelta(minutes=20),
+                        1, 'Buy', 10),
+            trade.Trade(self.stock2, now - timedelta(minutes=3),
+                        1, 'Buy', 7),
+            trade.Trade(self.stock1, now - timedelta(minutes=2),
+                        1, 'Buy', 3),
+            trade.Trade(self.stock1, now - timedelta(minutes=1),
+                        1, 'Buy', 5),
+        ])
+
+        prices = stl1.volume_weighted_stock_prices(now=now)
+        self.assertEqual(prices[self.stock1.symbol], 4)  # 3, 5; 10 too old
+        self.assertEqual(prices[self.stock2.symbol], 7)
+
+    def test_aos_layout(self):
+        now = datetime.datetime.now()
+
+        with self.assertRaises(Exception) as context:
+            trade.SimpleTradeList(layout='__BAD_LAYOUT__')
+        self.assertTrue('layout must be' in str(context.exception))
+
+        # same behaviour as the default layout, packed storage underneath
+        stl1 = trade.SimpleTradeList(layout='aos')
+        for i, price in enumerate((2, 3, 4)):
+            stl1.record_trade(
+                trade.Trade(self.stock1, now - timedelta(minutes=3 - i),
+                            1, 'Buy', price))
+        self.assertEqual(
+            stl1.volume_weighted_stock_price(self.stock1.symbol, now=now),
+            3)
+        self.assertAlmostEqual(stl1.geometric_mean(), (2 * 3 * 4) ** (1 / 3))
+
     def test_geometric_mean(self):
         now = datetime.datetime.now()
 